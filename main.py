@@ -5,12 +5,18 @@ For beginners: This bot monitors prediction markets and alerts users to profitab
 
 import discord
 from discord.ext import commands, tasks
-import requests
+import httpx
+import orjson
+import numpy as np
 import json
+import re
 import sqlite3
 import asyncio
+import threading
 from datetime import datetime, timedelta
+from collections import defaultdict, Counter
 import os
+import time
 
 # ============================================
 # BEGINNER SECTION: Configuration
@@ -23,12 +29,36 @@ POLL_INTERVAL_MINUTES = int(os.getenv('POLL_INTERVAL', '5'))
 # ============================================
 # Database Setup (Stores user preferences)
 # ============================================
+DB_PATH = 'edgealert.db'
+
+def connect_db():
+    """
+    Opens the database with speed-friendly settings
+    WAL + synchronous=NORMAL means commits don't wait for a full disk flush
+    """
+    # isolation_level=None: we run BEGIN/COMMIT ourselves when batching writes
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    c = conn.cursor()
+    c.execute("PRAGMA busy_timeout=5000")    # Wait up to 5s for a lock instead of failing
+    c.execute("PRAGMA journal_mode=WAL")
+    c.execute("PRAGMA synchronous=NORMAL")
+    c.execute("PRAGMA temp_store=MEMORY")
+    c.execute("PRAGMA mmap_size=134217728")  # 128 MB
+    c.execute("PRAGMA cache_size=-20000")    # ~20 MB page cache
+    return conn
+
+# Two long-lived connections for the whole bot (opening a new one per query is slow)
+# All writes go through WRITE_DB, one at a time; reads use READ_DB and never wait on writes (WAL)
+WRITE_DB = connect_db()
+READ_DB = connect_db()
+_write_lock = threading.RLock()  # Only one writer at a time (re-entrant for batched cycles)
+
 def init_database():
     """Creates tables if they don't exist - runs automatically"""
-    conn = sqlite3.connect('edgealert.db')
-    c = conn.cursor()
+    c = WRITE_DB.cursor()
     
     # Users table: stores who's subscribed and their preferences
+    # (keywords column is only read once, to move old data into user_keywords)
     c.execute('''CREATE TABLE IF NOT EXISTS users
                  (user_id TEXT PRIMARY KEY,
                   keywords TEXT,
@@ -36,6 +66,23 @@ def init_database():
                   is_pro INTEGER DEFAULT 0,
                   created_at TEXT)''')
     
+    # User keywords: one row per (user, keyword), so no duplicates
+    c.execute('''CREATE TABLE IF NOT EXISTS user_keywords
+                 (user_id TEXT,
+                  keyword TEXT,
+                  PRIMARY KEY (user_id, keyword))''')
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_kw
+                 ON user_keywords (keyword)''')
+    
+    # Move keywords saved the old way (one space-separated string) into user_keywords
+    with _write_lock, WRITE_DB:
+        WRITE_DB.execute("BEGIN")
+        old_rows = WRITE_DB.execute('''SELECT user_id, keywords FROM users
+                                       WHERE keywords IS NOT NULL''').fetchall()
+        WRITE_DB.executemany('INSERT OR IGNORE INTO user_keywords (user_id, keyword) VALUES (?, ?)',
+                             [(user_id, kw) for user_id, keywords in old_rows for kw in keywords.split()])
+        WRITE_DB.execute('UPDATE users SET keywords = NULL WHERE keywords IS NOT NULL')
+    
     # Alerts cache: prevents duplicate alerts
     c.execute('''CREATE TABLE IF NOT EXISTS alert_cache
                  (market_id TEXT,
@@ -43,28 +90,64 @@ def init_database():
                   timestamp TEXT,
                   PRIMARY KEY (market_id, user_id))''')
     
+    # Index for "how many alerts did this user get today?" lookups
+    c.execute('''CREATE INDEX IF NOT EXISTS idx_alert_user_ts
+                 ON alert_cache (user_id, timestamp)''')
+    
     # Market data cache: tracks price changes
     c.execute('''CREATE TABLE IF NOT EXISTS market_cache
                  (market_id TEXT PRIMARY KEY,
                   last_price REAL,
                   last_volume REAL,
                   updated_at TEXT)''')
-    
-    conn.commit()
-    conn.close()
 
 # ============================================
 # Polymarket API Functions
 # ============================================
-def fetch_polymarket_markets():
+# Async HTTP client so polling never freezes the bot while waiting on Polymarket
+# It's reused forever, so the connection (and TLS handshake) carries over between polls
+HTTP = httpx.AsyncClient(
+    base_url="https://gamma-api.polymarket.com",  # Polymarket's public API
+    http2=True,
+    timeout=10,
+    limits=httpx.Limits(max_keepalive_connections=4)
+)
+
+# Response cache: reuse a fresh answer for 60s, and back off for 5 min after a failure
+# (so extra callers can't spam Polymarket - the poll loop itself always asks for fresh data)
+MARKETS_CACHE_SECONDS = 60
+MARKETS_FAILURE_SECONDS = 5 * 60
+_last_ok = None        # (time.monotonic(), markets) from the last good fetch
+_last_fail_ts = None   # time.monotonic() of the last failed fetch
+
+# Conditional requests: Polymarket answers "304 Not Modified" (no body) if nothing changed
+_etag = None
+_last_modified = None
+
+async def fetch_polymarket_markets(use_cache=True):
     """
     Fetches active markets from Polymarket
-    Returns: List of market dictionaries
+    use_cache: False skips the 60s cache and failure backoff (poll_markets runs
+               on its own schedule and should never be slowed down by them)
+    Returns: (markets, status)
+    markets: List of market dictionaries
+    status: "fresh" (new data), "unchanged" (304 or recent cache) or
+            "failed" (API error or backing off - markets is the last good data, or empty)
     """
-    try:
-        # Polymarket's public API endpoint
-        url = "https://gamma-api.polymarket.com/markets"
+    global _last_ok, _last_fail_ts, _etag, _last_modified
+    now = time.monotonic()
+    cached = _last_ok[1] if _last_ok else []
+    
+    if use_cache:
+        # Fetched recently? Reuse it
+        if _last_ok and now - _last_ok[0] < MARKETS_CACHE_SECONDS:
+            return cached, "unchanged"
         
+        # Failed recently? Don't hit the API again yet, use the last good data
+        if _last_fail_ts is not None and now - _last_fail_ts < MARKETS_FAILURE_SECONDS:
+            return cached, "failed"
+    
+    try:
         # Request top 100 active markets
         params = {
             'limit': 100,
@@ -72,10 +155,23 @@ def fetch_polymarket_markets():
             'closed': 'false'
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        # Ask "has anything changed since last time?" (ETag if we have one, else the date)
+        headers = {}
+        if _etag:
+            headers['If-None-Match'] = _etag
+        elif _last_modified:
+            headers['If-Modified-Since'] = _last_modified
+        
+        response = await HTTP.get("/markets", params=params, headers=headers)
+        
+        # Nothing changed - hand back the same list
+        if response.status_code == 304 and _last_ok:
+            _last_ok = (time.monotonic(), _last_ok[1])
+            return _last_ok[1], "unchanged"
+        
         response.raise_for_status()
         
-        markets = response.json()
+        markets = orjson.loads(response.content)  # orjson is a much faster JSON parser
         
         # Simplify the data structure for easier use
         simplified = []
@@ -92,12 +188,16 @@ def fetch_polymarket_markets():
             except (KeyError, ValueError, IndexError):
                 # Skip markets with incomplete data
                 continue
-                
-        return simplified
         
-    except requests.exceptions.RequestException as e:
+        _last_ok = (time.monotonic(), simplified)
+        _etag = response.headers.get('ETag')
+        _last_modified = response.headers.get('Last-Modified')
+        return simplified, "fresh"
+        
+    except (httpx.HTTPError, orjson.JSONDecodeError) as e:
         print(f"⚠️ API Error: {e}")
-        return []  # Return empty list on error, bot will retry next cycle
+        _last_fail_ts = time.monotonic()
+        return cached, "failed"  # Last good data (or empty list), bot will retry next cycle
 
 def calculate_edge(market, user_estimate=0.5):
     """
@@ -161,56 +261,146 @@ def check_alert_conditions(market, old_data, threshold):
     
     return False, None, {}
 
-def get_cached_market_data(market_id):
-    """Retrieves last known data for a market"""
-    conn = sqlite3.connect('edgealert.db')
-    c = conn.cursor()
-    c.execute('SELECT last_price, last_volume FROM market_cache WHERE market_id = ?', (market_id,))
-    result = c.fetchone()
-    conn.close()
+def find_moving_markets(markets, market_cache_map, min_threshold):
+    """
+    Fast first pass over ALL markets at once (numpy does the math in C)
+    Same rules as check_alert_conditions, using the lowest threshold of any user
     
-    if result:
-        return {'last_price': result[0], 'last_volume': result[1]}
-    return None
+    Returns: Positions in `markets` that might trigger an alert for someone
+    """
+    if not markets:
+        return []
+    
+    # One array per field instead of one dict per market
+    old_data = [market_cache_map.get(market['id']) for market in markets]
+    new_prices = np.array([market['yes_price'] for market in markets], dtype=float)
+    new_volumes = np.array([market['volume_24h'] for market in markets], dtype=float)
+    old_prices = np.array([old['last_price'] if old else np.nan for old in old_data], dtype=float)
+    old_volumes = np.array([old['last_volume'] if old else np.nan for old in old_data], dtype=float)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        price_change = np.where(old_prices > 0, ((new_prices - old_prices) / old_prices) * 100, 0)
+        volume_change = np.where(old_volumes > 0, ((new_volumes - old_volumes) / old_volumes) * 100, 0)
+    
+    # No old data = first time seeing this market, never alert
+    has_history = ~np.isnan(old_prices)
+    big_move = np.abs(price_change) >= min_threshold
+    whale = (volume_change > 200) & (new_volumes > 5000)
+    
+    return np.flatnonzero(has_history & (big_move | whale)).tolist()
 
-def update_market_cache(market):
-    """Saves current market data for future comparison"""
-    conn = sqlite3.connect('edgealert.db')
-    c = conn.cursor()
-    c.execute('''INSERT OR REPLACE INTO market_cache 
-                 (market_id, last_price, last_volume, updated_at)
-                 VALUES (?, ?, ?, ?)''',
-              (market['id'], market['yes_price'], market['volume_24h'], 
-               datetime.now().isoformat()))
-    conn.commit()
-    conn.close()
-
-def should_send_alert(market_id, user_id):
-    """Prevents duplicate alerts (cooldown: 30 minutes)"""
-    conn = sqlite3.connect('edgealert.db')
-    c = conn.cursor()
+def start_of_today():
+    """
+    Midnight today as an ISO string
+    Timestamps are ISO strings, so `timestamp >= start_of_today()` works and uses the index
+    (DATE(timestamp) = ? can't use an index)
+    """
+    return datetime.combine(datetime.now().date(), datetime.min.time()).isoformat()
+
+def update_market_cache(markets, now_iso):
+    """
+    Saves current data for all markets in one go (for future comparison)
+    No commit here - poll_markets commits the whole cycle at once
+    now_iso: the cycle's timestamp (worked out once, not per market)
+    """
+    rows = [(market['id'], market['yes_price'], market['volume_24h'], now_iso) for market in markets]
+    with _write_lock:
+        WRITE_DB.executemany('''INSERT OR REPLACE INTO market_cache 
+                                (market_id, last_price, last_volume, updated_at)
+                                VALUES (?, ?, ?, ?)''', rows)
+
+# Recent alerts kept in memory: (market_id, user_id) -> ISO timestamp
+# Saves a database read for every possible alert
+_alert_cooldowns = {}
+
+def load_alert_cooldowns():
+    """Fills the in-memory cooldowns from the database (run once at startup)"""
+    cooldown_start = (datetime.now() - timedelta(minutes=30)).isoformat()
+    rows = READ_DB.execute('''SELECT market_id, user_id, timestamp FROM alert_cache
+                              WHERE timestamp > ?''', (cooldown_start,)).fetchall()
+    _alert_cooldowns.update(((market_id, user_id), ts) for market_id, user_id, ts in rows)
+
+def should_send_alert(market_id, user_id, now_iso, cooldown_start, new_cooldowns):
+    """
+    Prevents duplicate alerts (cooldown: 30 minutes)
+    now_iso: the cycle's timestamp, cooldown_start: 30 minutes before it
+    (ISO strings compare correctly as plain text, so no parsing needed)
+    new_cooldowns: this cycle's alerts - copied into _alert_cooldowns only after
+    the cycle commits, so a rolled-back cycle doesn't mute anyone
+    Save the alert itself with mark_alerts_sent
+    """
+    # Check if we sent this alert recently (in memory, no database read)
+    key = (market_id, user_id)
+    last_alert = new_cooldowns.get(key) or _alert_cooldowns.get(key)
+    if last_alert and last_alert > cooldown_start:
+        return False  # Too soon, skip
     
-    # Check if we sent this alert recently
-    c.execute('''SELECT timestamp FROM alert_cache 
-                 WHERE market_id = ? AND user_id = ?''',
-              (market_id, user_id))
-    result = c.fetchone()
-    
-    if result:
-        # Parse timestamp
-        last_alert_time = datetime.fromisoformat(result[0])
-        if datetime.now() - last_alert_time < timedelta(minutes=30):
-            conn.close()
-            return False  # Too soon, skip
-    
-    # Mark as alerted
-    c.execute('''INSERT OR REPLACE INTO alert_cache 
-                 (market_id, user_id, timestamp) VALUES (?, ?, ?)''',
-              (market_id, user_id, datetime.now().isoformat()))
-    conn.commit()
-    conn.close()
+    new_cooldowns[key] = now_iso
     return True
 
+def mark_alerts_sent(rows):
+    """
+    Saves a cycle's alerts to alert_cache in one go
+    rows: (market_id, user_id, timestamp) tuples
+    """
+    with _write_lock:
+        WRITE_DB.executemany('''INSERT OR REPLACE INTO alert_cache 
+                                (market_id, user_id, timestamp) VALUES (?, ?, ?)''', rows)
+
+# ============================================
+# Database Helpers for Commands
+# (Called with asyncio.to_thread so the bot stays responsive)
+# ============================================
+def get_all_users():
+    """
+    Returns: (users, keyword_rows)
+    users: (user_id, threshold, is_pro) for every subscriber
+    keyword_rows: (keyword, user_id) for every watched keyword
+    """
+    users = READ_DB.execute('SELECT user_id, threshold, is_pro FROM users').fetchall()
+    keyword_rows = READ_DB.execute('SELECT keyword, user_id FROM user_keywords').fetchall()
+    return users, keyword_rows
+
+def save_keywords(user_id, keywords):
+    """Adds keywords to a user's watchlist (creates the user if new)"""
+    with _write_lock, WRITE_DB:
+        WRITE_DB.execute("BEGIN")
+        
+        # New user? (does nothing if they already exist)
+        WRITE_DB.execute('''INSERT OR IGNORE INTO users (user_id, created_at)
+                            VALUES (?, ?)''',
+                         (user_id, datetime.now().isoformat()))
+        
+        # Keywords they already watch are skipped, so no duplicates
+        WRITE_DB.executemany('INSERT OR IGNORE INTO user_keywords (user_id, keyword) VALUES (?, ?)',
+                             [(user_id, kw) for kw in keywords])
+
+def save_threshold(user_id, percentage):
+    """Updates a user's alert sensitivity"""
+    with _write_lock:
+        WRITE_DB.execute('UPDATE users SET threshold = ? WHERE user_id = ?', 
+                         (percentage, user_id))
+
+def get_user_stats(user_id):
+    """
+    Returns: (alerts_today, settings) where settings is
+    (keywords, threshold, is_pro) or None if not subscribed
+    """
+    # Count alerts sent today
+    alert_count = READ_DB.execute('''SELECT COUNT(*) FROM alert_cache 
+                                     WHERE user_id = ? AND timestamp >= ?''',
+                                  (user_id, start_of_today())).fetchone()[0]
+    
+    # Get user settings
+    settings = READ_DB.execute('SELECT threshold, is_pro FROM users WHERE user_id = ?', 
+                               (user_id,)).fetchone()
+    keywords = READ_DB.execute('SELECT keyword FROM user_keywords WHERE user_id = ? ORDER BY rowid',
+                               (user_id,)).fetchall()
+    
+    if not settings:
+        return alert_count, None
+    return alert_count, (' '.join(kw for (kw,) in keywords), *settings)
+
 # ============================================
 # Discord Bot Setup
 # ============================================
@@ -218,6 +408,24 @@ intents = discord.Intents.default()
 intents.message_content = True
 bot = commands.Bot(command_prefix='/', intents=intents)
 
+# Discord users we've already looked up (fetch_user is a slow API call)
+_user_cache = {}
+
+async def get_discord_user(user_id):
+    """Finds a Discord user, only asking Discord's API if we've never seen them"""
+    user = _user_cache.get(user_id) or bot.get_user(user_id)
+    if user is None:
+        user = await bot.fetch_user(user_id)
+    _user_cache[user_id] = user
+    return user
+
+async def setup_hook():
+    """Runs once before connecting (on_ready can fire again after every reconnect)"""
+    # Make alert buttons keep working on messages sent before a restart
+    bot.add_view(AlertView())
+
+bot.setup_hook = setup_hook
+
 @bot.event
 async def on_ready():
     """Runs when bot starts successfully"""
@@ -244,27 +452,7 @@ async def subscribe(ctx, *keywords):
     user_id = str(ctx.author.id)
     keywords_str = ' '.join(keywords).lower()
     
-    conn = sqlite3.connect('edgealert.db')
-    c = conn.cursor()
-    
-    # Check if user exists
-    c.execute('SELECT keywords FROM users WHERE user_id = ?', (user_id,))
-    result = c.fetchone()
-    
-    if result:
-        # Add to existing keywords
-        existing = result[0]
-        new_keywords = f"{existing} {keywords_str}"
-        c.execute('UPDATE users SET keywords = ? WHERE user_id = ?', 
-                  (new_keywords, user_id))
-    else:
-        # New user
-        c.execute('''INSERT INTO users (user_id, keywords, created_at)
-                     VALUES (?, ?, ?)''',
-                  (user_id, keywords_str, datetime.now().isoformat()))
-    
-    conn.commit()
-    conn.close()
+    await asyncio.to_thread(save_keywords, user_id, keywords_str.split())
     
     # Send confirmation with nice embed
     embed = discord.Embed(
@@ -290,12 +478,7 @@ async def set_threshold(ctx, percentage: float):
     
     user_id = str(ctx.author.id)
     
-    conn = sqlite3.connect('edgealert.db')
-    c = conn.cursor()
-    c.execute('UPDATE users SET threshold = ? WHERE user_id = ?', 
-              (percentage, user_id))
-    conn.commit()
-    conn.close()
+    await asyncio.to_thread(save_threshold, user_id, percentage)
     
     await ctx.send(f"✅ Alert threshold set to **{percentage}%**")
 
@@ -331,22 +514,7 @@ async def stats(ctx):
     """Shows your alert stats"""
     user_id = str(ctx.author.id)
     
-    conn = sqlite3.connect('edgealert.db')
-    c = conn.cursor()
-    
-    # Count alerts sent today
-    today = datetime.now().date().isoformat()
-    c.execute('''SELECT COUNT(*) FROM alert_cache 
-                 WHERE user_id = ? AND DATE(timestamp) = ?''',
-              (user_id, today))
-    alert_count = c.fetchone()[0]
-    
-    # Get user settings
-    c.execute('SELECT keywords, threshold, is_pro FROM users WHERE user_id = ?', 
-              (user_id,))
-    result = c.fetchone()
-    
-    conn.close()
+    alert_count, result = await asyncio.to_thread(get_user_stats, user_id)
     
     if not result:
         await ctx.send("❌ You're not subscribed yet! Use `/subscribe` to start.")
@@ -368,6 +536,119 @@ async def stats(ctx):
 # ============================================
 # Background Task: Market Polling
 # ============================================
+def process_markets(markets, users, keyword_rows, today_start, now):
+    """
+    Compares fresh market data against the cache and decides who gets alerted
+    Runs in a worker thread (all the slow database work lives here)
+    today_start: start_of_today(), now: datetime.now() - both worked out once per cycle
+    
+    Returns: List of (user_id, market, alert_type, details) to send
+    """
+    pending_alerts = []
+    alert_rows = []  # Saved to alert_cache in one batch at the end
+    new_cooldowns = {}  # Applied to _alert_cooldowns once the cycle is committed
+    now_iso = now.isoformat()
+    cooldown_start = (now - timedelta(minutes=30)).isoformat()
+    
+    # Build a keyword -> users lookup once per cycle
+    # (instead of checking every user's keywords against every market)
+    user_settings = {user_id: (threshold, is_pro) for user_id, threshold, is_pro in users}
+    
+    kw_to_users = defaultdict(set)
+    for kw, user_id in keyword_rows:
+        if user_id in user_settings:  # Skip anyone who subscribed after `users` was read
+            kw_to_users[kw].add(user_id)
+    
+    # Users with no keywords get every market
+    watch_everything = set(user_settings).difference(*kw_to_users.values())
+    
+    # The most sensitive threshold anyone uses - if a market doesn't move this much, nobody cares
+    min_threshold = min(threshold for threshold, is_pro in user_settings.values())
+    
+    # One compiled regex finds every watched keyword in a question in a single pass
+    # Longest keywords first, and the lookahead (?=...) lets matches overlap
+    keyword_pattern = None
+    if kw_to_users:
+        by_length = sorted(kw_to_users, key=len, reverse=True)
+        keyword_pattern = re.compile('(?=(' + '|'.join(map(re.escape, by_length)) + '))')
+    
+    # A hit on "bitcoin" means "bit" is in the question too
+    contained_keywords = {kw: [other for other in kw_to_users if other in kw] for kw in kw_to_users}
+    
+    # All database writes for this cycle go into ONE transaction (one disk sync instead of hundreds)
+    with _write_lock, WRITE_DB:
+        WRITE_DB.execute("BEGIN")
+        
+        # Load everything we need up front (2 queries instead of one per market/user)
+        market_cache_map = {
+            market_id: {'last_price': last_price, 'last_volume': last_volume}
+            for market_id, last_price, last_volume
+            in WRITE_DB.execute('SELECT market_id, last_price, last_volume FROM market_cache')
+        }
+        # alert_cache keeps one row per (market, user), so re-alerting a market
+        # later the same day replaces its row rather than adding one
+        today_pairs = set(WRITE_DB.execute('''SELECT market_id, user_id FROM alert_cache 
+                                              WHERE timestamp >= ?''',
+                                           (today_start,)))
+        today_counts = Counter(user_id for market_id, user_id in today_pairs)
+        
+        # Only markets that moved enough get checked user by user (quiet markets are skipped)
+        for i in find_moving_markets(markets, market_cache_map, min_threshold):
+            market = markets[i]
+            
+            # Get historical data for this market
+            old_data = market_cache_map.get(market['id'])
+            
+            # Match keywords (e.g., user watches "crypto", market is "crypto")
+            question = market['question'].lower()
+            category = market['category']
+            hits = set()
+            if keyword_pattern:
+                for kw in set(keyword_pattern.findall(question)):
+                    hits.update(contained_keywords[kw])
+            if category in kw_to_users:
+                hits.add(category)
+            matched_users = watch_everything.union(*(kw_to_users[kw] for kw in hits))
+            
+            # Check only the users interested in this market
+            for user_id in matched_users:
+                threshold, is_pro = user_settings[user_id]
+                
+                # Check if this market should trigger an alert
+                should_alert, alert_type, details = check_alert_conditions(
+                    market, old_data, threshold
+                )
+                
+                if should_alert:
+                    # Check cooldown (prevent spam)
+                    if not should_send_alert(market['id'], user_id, now_iso, cooldown_start, new_cooldowns):
+                        continue
+                    alert_rows.append((market['id'], user_id, now_iso))
+                    
+                    # Counts toward today once saved to alert_cache (unless it replaces today's row)
+                    if (market['id'], user_id) not in today_pairs:
+                        today_pairs.add((market['id'], user_id))
+                        today_counts[user_id] += 1
+                    
+                    # Check free tier limits (3 alerts/day)
+                    if not is_pro:
+                        if today_counts[user_id] >= 3:
+                            continue  # Free tier limit reached
+                    
+                    pending_alerts.append((user_id, market, alert_type, details))
+        
+        # Save this cycle's alerts and new market data (one batch each)
+        mark_alerts_sent(alert_rows)
+        update_market_cache(markets, now_iso)
+    
+    # Committed - now it's safe to update the in-memory cooldowns
+    # (and forget ones that have run out, to keep it small)
+    for key in [key for key, ts in _alert_cooldowns.items() if ts <= cooldown_start]:
+        del _alert_cooldowns[key]
+    _alert_cooldowns.update(new_cooldowns)
+    
+    return pending_alerts
+
 @tasks.loop(minutes=POLL_INTERVAL_MINUTES)
 async def poll_markets():
     """
@@ -376,80 +657,93 @@ async def poll_markets():
     """
     print(f"🔄 Polling Polymarket... ({datetime.now().strftime('%H:%M:%S')})")
     
+    # Worked out once per cycle and reused everywhere below
+    now = datetime.now()
+    today_start = start_of_today()
+    
     # Fetch latest market data
-    markets = fetch_polymarket_markets()
+    markets, status = await fetch_polymarket_markets(use_cache=False)
     
-    if not markets:
+    if status == "failed" or not markets:
         print("⚠️ No markets fetched, will retry next cycle")
         return
     
+    # Polymarket says nothing changed (304) = nothing to alert on
+    if status == "unchanged":
+        print("💤 Markets unchanged since last poll, skipping")
+        return
+    
     print(f"📊 Fetched {len(markets)} markets")
     
     # Get all subscribed users
-    conn = sqlite3.connect('edgealert.db')
-    c = conn.cursor()
-    c.execute('SELECT user_id, keywords, threshold, is_pro FROM users')
-    users = c.fetchall()
-    conn.close()
+    users, keyword_rows = await asyncio.to_thread(get_all_users)
     
     if not users:
         print("📭 No subscribed users yet")
         return
     
-    alerts_sent = 0
+    # Database work happens off the event loop so commands stay snappy
+    pending_alerts = await asyncio.to_thread(process_markets, markets, users, keyword_rows, today_start, now)
     
-    # Check each market against each user's preferences
-    for market in markets:
-        # Get historical data for this market
-        old_data = get_cached_market_data(market['id'])
-        
-        # Check each subscribed user
-        for user_id, keywords, threshold, is_pro in users:
-            # Match keywords (e.g., user watches "crypto", market is "crypto")
-            user_keywords = keywords.split() if keywords else []
-            
-            # Skip if market doesn't match user's interests
-            if user_keywords and not any(kw in market['question'].lower() or kw == market['category'] 
-                                        for kw in user_keywords):
-                continue
-            
-            # Check if this market should trigger an alert
-            should_alert, alert_type, details = check_alert_conditions(
-                market, old_data, threshold
-            )
-            
-            if should_alert:
-                # Check cooldown (prevent spam)
-                if not should_send_alert(market['id'], user_id):
-                    continue
-                
-                # Check free tier limits (3 alerts/day)
-                if not is_pro:
-                    today = datetime.now().date().isoformat()
-                    conn = sqlite3.connect('edgealert.db')
-                    c = conn.cursor()
-                    c.execute('''SELECT COUNT(*) FROM alert_cache 
-                                 WHERE user_id = ? AND DATE(timestamp) = ?''',
-                              (user_id, today))
-                    alert_count = c.fetchone()[0]
-                    conn.close()
-                    
-                    if alert_count >= 3:
-                        continue  # Free tier limit reached
-                
-                # Send the alert!
-                try:
-                    user = await bot.fetch_user(int(user_id))
-                    await send_alert_embed(user, market, alert_type, details)
-                    alerts_sent += 1
-                except Exception as e:
-                    print(f"⚠️ Failed to send alert to {user_id}: {e}")
-        
-        # Update cache with new data
-        update_market_cache(market)
+    # Send the alerts! (several at once instead of one after another)
+    results = await asyncio.gather(*(
+        deliver_alert(user_id, market, alert_type, details)
+        for user_id, market, alert_type, details in pending_alerts
+    ))
+    alerts_sent = sum(results)
     
     print(f"✉️ Sent {alerts_sent} alerts this cycle")
 
+# At most 5 DMs in flight at once (keeps us friendly with Discord's rate limits)
+_dm_semaphore = asyncio.Semaphore(5)
+
+async def deliver_alert(user_id, market, alert_type, details):
+    """
+    Looks up the user and sends them one alert
+    Returns: True if it was sent
+    """
+    async with _dm_semaphore:
+        try:
+            user = await get_discord_user(int(user_id))
+            await send_alert_embed(user, market, alert_type, details)
+            return True
+        except Exception as e:
+            print(f"⚠️ Failed to send alert to {user_id}: {e}")
+            return False
+
+class AlertView(discord.ui.View):
+    """
+    Quick-action buttons under every alert
+    Buttons ride along with the DM itself (reactions cost 3 extra API calls per alert)
+    """
+    def __init__(self):
+        # timeout=None + fixed custom_ids = buttons keep working forever
+        super().__init__(timeout=None)
+    
+    @discord.ui.button(label="Trade", emoji="🎯", style=discord.ButtonStyle.green,
+                       custom_id="edgealert:trade")
+    async def trade(self, interaction, button):
+        """Sends the Polymarket referral link"""
+        await interaction.response.send_message(
+            f"🎯 Trade on Polymarket: https://polymarket.com/?ref={POLYMARKET_REF_CODE}"
+        )
+    
+    @discord.ui.button(label="Details", emoji="📊", style=discord.ButtonStyle.blurple,
+                       custom_id="edgealert:details")
+    async def details(self, interaction, button):
+        """Points to the dashboard for charts"""
+        await interaction.response.send_message(
+            "📱 **Your Dashboard:** https://your-app-url.com\n(Open to see detailed charts & settings)"
+        )
+    
+    @discord.ui.button(label="Mute", emoji="🔕", style=discord.ButtonStyle.gray,
+                       custom_id="edgealert:mute")
+    async def mute(self, interaction, button):
+        """Explains how to get fewer alerts"""
+        await interaction.response.send_message(
+            "🔕 Want fewer alerts? Raise your threshold, e.g. `/threshold 15`"
+        )
+
 async def send_alert_embed(user, market, alert_type, details):
     """
     Creates and sends a beautiful alert embed to the user
@@ -521,16 +815,11 @@ async def send_alert_embed(user, market, alert_type, details):
             inline=True
         )
     
-    embed.set_footer(text="⚡ Powered by EdgeAlert • React 🎯 to trade")
+    embed.set_footer(text="⚡ Powered by EdgeAlert • Tap 🎯 Trade to get started")
     
-    # Send with buttons (view buttons are simulated with text since Discord.py buttons need views)
+    # Send with buttons (one API call - the buttons are part of the message)
     try:
-        message = await user.send(embed=embed)
-        
-        # Add reaction emojis for quick actions
-        await message.add_reaction("🎯")  # Trade
-        await message.add_reaction("📊")  # Details
-        await message.add_reaction("🔕")  # Mute
+        await user.send(embed=embed, view=AlertView())
         
     except discord.Forbidden:
         print(f"⚠️ Cannot DM user {user.id} (DMs disabled)")
@@ -558,6 +847,7 @@ if __name__ == "__main__":
     
     # Initialize database
     init_database()
+    load_alert_cooldowns()
     print("✅ Database initialized")
     
     # Check configuration